@@ -1,90 +1,171 @@
 """Shared utilities for xls2pdf Lambda handlers."""
 
 import base64
+import binascii
 import hashlib
-import json
+import io
 import logging
 import os
-import tempfile
-from pathlib import Path, PurePosixPath
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+try:
+    from pybase64 import b64decode, b64encode_as_string
+except ImportError:  # pragma: no cover - fall back to the scalar stdlib codec
+    from base64 import b64decode
+
+    def b64encode_as_string(s: bytes) -> str:
+        return base64.b64encode(s).decode("ascii")
+
+try:
+    from orjson import dumps as _orjson_dumps
+    from orjson import loads as json_loads
+
+    def json_dumps(obj: Any) -> str:
+        return _orjson_dumps(obj).decode("utf-8")
+
+except ImportError:  # pragma: no cover - fall back to the stdlib codec
+    from json import dumps as json_dumps
+    from json import loads as json_loads
+
 LOGGER = logging.getLogger("xls2pdf")
 LOGGER.setLevel(logging.INFO)
 
-S3_CLIENT = boto3.client("s3")
-SSM_CLIENT = boto3.client("ssm")
+# Shared by the convert workers, their multipart PDF uploads and the prefix-delete pool.
+CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={"max_attempts": 3, "mode": "adaptive"},
+)
 
 PDF_CONTENT_TYPE = "application/pdf"
 XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 SUPPORTED_INPUT_FORMAT = "xlsx"
+SUPPORTED_INPUT_SUFFIX = f".{SUPPORTED_INPUT_FORMAT}"
 RESULT_OBJECT_NAME = "result"
 
+DEFAULT_TARGET_BUCKET = os.getenv("DEFAULT_TARGET_BUCKET")
+SOURCE_BUCKET = os.getenv("SOURCE_BUCKET")
+
+# Multiple of 4 so every slice of a base64 payload decodes independently.
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+S3_READ_CHUNK_SIZE = 1024 * 1024
+
+# DeleteObjects accepts at most 1000 keys per request.
+DELETE_BATCH_SIZE = 1000
+MAX_CONCURRENT_DELETES = 16
+# In-progress polls for the same result reuse a located workbook key for a few seconds.
+ORIGINAL_LOOKUP_CACHE_TTL_SECONDS = 5.0
+ORIGINAL_LOOKUP_CACHE_SIZE = 256
+
+_CLIENTS: Dict[str, Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+_ORIGINAL_LOOKUP_CACHE: Dict[Tuple[str, str], Tuple[float, str]] = {}
+_SHA256_HEX_RE = re.compile(r"[0-9a-fA-F]{64}")
+# Shared across warm invocations so pruning does not pay thread start-up on every request.
+_DELETE_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DELETES, thread_name_prefix="xls2pdf-delete")
+
 
 class ConversionError(Exception):
     """Raised when an operation within the conversion pipeline fails."""
 
 
+def get_s3_client() -> Any:
+    return _get_client("s3")
+
+
+def get_ssm_client() -> Any:
+    return _get_client("ssm")
+
+
+def _get_client(service_name: str) -> Any:
+    # Built on first use (handlers warm theirs at import); the lock stops threads building duplicates.
+    client = _CLIENTS.get(service_name)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(service_name)
+            if client is None:
+                client = _CLIENTS[service_name] = boto3.client(service_name, config=CLIENT_CONFIG)
+    return client
+
+
 def get_default_bucket() -> str:
-    bucket = os.getenv("DEFAULT_TARGET_BUCKET")
-    if not bucket:
+    if not DEFAULT_TARGET_BUCKET:
         raise ConversionError("DEFAULT_TARGET_BUCKET is not configured")
-    return bucket
+    return DEFAULT_TARGET_BUCKET
 
 
-def calculate_sha256(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+def hex_digest(digest: bytes) -> str:
+    return binascii.hexlify(digest).decode("ascii")
 
 
 def sanitize_filename(raw: Optional[str]) -> str:
     if not raw:
         return ""
-    candidate = Path(raw).name
+    candidate = os.path.basename(raw)
     if not candidate:
         return ""
-    if not candidate.lower().endswith(f".{SUPPORTED_INPUT_FORMAT}"):
+    if not is_supported_workbook_key(candidate):
         raise ConversionError(f"Filename must end with .{SUPPORTED_INPUT_FORMAT}: '{raw}'")
     return candidate
 
 
-def load_workbook_bytes(data: str, *, default_bucket: Optional[str]) -> Tuple[bytes, str]:
+def load_workbook_bytes(data: str, *, default_bucket: Optional[str]) -> Tuple[bytes, str, bytes]:
     if data.startswith("s3://"):
         bucket, key = parse_s3_uri(data)
         LOGGER.info("Downloading workbook from %s", data)
         try:
-            response = S3_CLIENT.get_object(Bucket=bucket, Key=key)
+            response = get_s3_client().get_object(Bucket=bucket, Key=key)
         except ClientError as error:
             raise ConversionError(f"Unable to read source object {data}") from error
-        workbook_bytes = response["Body"].read()
+        workbook_bytes, digest = _read_and_hash(response["Body"])
         if not workbook_bytes:
             raise ConversionError("Workbook content is empty")
-        return workbook_bytes, data
+        return workbook_bytes, data, digest
 
     if data.startswith("/") and default_bucket:
         return load_workbook_bytes(f"s3://{default_bucket}{data}", default_bucket=default_bucket)
 
+    # Well-formed base64 is always a whole number of 4-character quanta; reject anything else before decoding.
+    if len(data) % 4:
+        raise ConversionError("Workbook payload is not valid base64 content")
+
     try:
-        workbook_bytes = base64.b64decode(data)
+        workbook_bytes, digest = _decode_base64_payload(data)
     except (ValueError, TypeError) as exc:
         raise ConversionError("Workbook payload is not valid base64 content") from exc
 
     if not workbook_bytes:
         raise ConversionError("Workbook content is empty")
 
-    return workbook_bytes, "inline"
+    return workbook_bytes, "inline", digest
 
 
-def write_temp_workbook(contents: bytes) -> str:
-    if not contents:
-        raise ConversionError("Workbook content is empty")
+def _read_and_hash(body: Any) -> Tuple[bytes, bytes]:
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    for chunk in body.iter_chunks(S3_READ_CHUNK_SIZE):
+        digest.update(chunk)
+        buffer.write(chunk)
+    return buffer.getvalue(), digest.digest()
+
 
-    with tempfile.NamedTemporaryFile(prefix="xls2pdf", suffix=".xlsx", delete=False) as handle:
-        handle.write(contents)
-        temp_path = handle.name
-    return temp_path
+def _decode_base64_payload(data: str) -> Tuple[bytes, bytes]:
+    # Decode and hash slice by slice; the payload is never re-encoded to ASCII in one piece.
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    for offset in range(0, len(data), BASE64_DECODE_CHUNK_SIZE):
+        chunk = b64decode(data[offset : offset + BASE64_DECODE_CHUNK_SIZE], validate=True)
+        digest.update(chunk)
+        buffer.write(chunk)
+    return buffer.getvalue(), digest.digest()
 
 
 def parse_s3_uri(uri: str) -> Tuple[str, str]:
@@ -92,17 +173,23 @@ def parse_s3_uri(uri: str) -> Tuple[str, str]:
     if not uri.startswith(prefix):
         raise ConversionError(f"Invalid S3 URI: {uri}")
 
-    remainder = uri[len(prefix) :]
-    if "/" not in remainder:
-        bucket, key = remainder, ""
-    else:
-        bucket, key = remainder.split("/", 1)
-
+    bucket, _, key = uri[len(prefix) :].partition("/")
     if not bucket:
         raise ConversionError(f"Invalid S3 URI: {uri}")
     return bucket, key
 
 
+def pdf_filename_for(key: str) -> str:
+    name = key.rsplit("/", 1)[-1]
+    stem, _, _ = name.rpartition(".")
+    return f"{stem or name}.pdf"
+
+
+def is_supported_workbook_key(key: str) -> bool:
+    # Only the suffix is lowercased, never a copy of the whole key.
+    return key[-len(SUPPORTED_INPUT_SUFFIX) :].lower() == SUPPORTED_INPUT_SUFFIX
+
+
 def build_object_key(file_hash: str, filename: str) -> str:
     return join_key(file_hash, filename)
 
@@ -115,8 +202,7 @@ def join_key(prefix: str, name: str) -> str:
 
 
 def prefix_for_key(key: str) -> str:
-    parent = str(PurePosixPath(key).parent)
-    return "" if parent == "." else parent
+    return key.rpartition("/")[0]
 
 
 def delete_prefix_contents(bucket: str, prefix: str) -> None:
@@ -125,35 +211,42 @@ def delete_prefix_contents(bucket: str, prefix: str) -> None:
         LOGGER.warning("Refusing to delete entire bucket '%s'; prefix is empty", bucket)
         return
 
-    paginator = S3_CLIENT.get_paginator("list_objects_v2")
+    paginator = get_s3_client().get_paginator("list_objects_v2")
     full_prefix = f"{prefix}/"
 
+    futures: List["Future[None]"] = []
     try:
+        # Listing continues on this thread while earlier pages are deleted on the pool.
         for page in paginator.paginate(Bucket=bucket, Prefix=full_prefix):
             keys = [item["Key"] for item in page.get("Contents", []) if item.get("Key")]
             if not keys:
                 continue
-            _delete_object_batch(bucket, keys)
+            futures.extend(_schedule_delete_batches(bucket, keys))
     except ClientError as error:
         raise ConversionError(
             f"Unable to prune existing objects under prefix '{full_prefix}' in bucket '{bucket}'"
         ) from error
 
+    for future in as_completed(futures):
+        future.result()
 
-def _delete_object_batch(bucket: str, keys: Iterable[str]) -> None:
+
+def _schedule_delete_batches(bucket: str, keys: Iterable[str]) -> List["Future[None]"]:
+    futures: List["Future[None]"] = []
     chunk: List[str] = []
     for key in keys:
         chunk.append(key)
-        if len(chunk) == 1000:
-            _submit_delete_batch(bucket, chunk)
+        if len(chunk) == DELETE_BATCH_SIZE:
+            futures.append(_DELETE_EXECUTOR.submit(_submit_delete_batch, bucket, chunk))
             chunk = []
     if chunk:
-        _submit_delete_batch(bucket, chunk)
+        futures.append(_DELETE_EXECUTOR.submit(_submit_delete_batch, bucket, chunk))
+    return futures
 
 
 def _submit_delete_batch(bucket: str, keys: Iterable[str]) -> None:
     try:
-        S3_CLIENT.delete_objects(
+        get_s3_client().delete_objects(
             Bucket=bucket,
             Delete={"Objects": [{"Key": key} for key in keys]},
         )
@@ -163,42 +256,70 @@ def _submit_delete_batch(bucket: str, keys: Iterable[str]) -> None:
         ) from error
 
 
-def find_original_object(bucket: str, lookup_key: str) -> Optional[str]:
+def find_original_object(bucket: str, lookup_key: str, *, candidate_name: Optional[str] = None) -> Optional[str]:
+    # Resubmissions prune the prefix, so cached keys only serve in-progress polls that have no marker yet.
+    if candidate_name:
+        return _locate_original_object(bucket, lookup_key, candidate_name)
+
+    cache_key = (bucket, lookup_key)
+    cached = _ORIGINAL_LOOKUP_CACHE.get(cache_key)
+    if cached and time.monotonic() - cached[0] < ORIGINAL_LOOKUP_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    original_key = _locate_original_object(bucket, lookup_key, None)
+    if original_key:
+        _ORIGINAL_LOOKUP_CACHE.pop(cache_key, None)
+        if len(_ORIGINAL_LOOKUP_CACHE) >= ORIGINAL_LOOKUP_CACHE_SIZE:
+            _ORIGINAL_LOOKUP_CACHE.pop(next(iter(_ORIGINAL_LOOKUP_CACHE)), None)
+        _ORIGINAL_LOOKUP_CACHE[cache_key] = (time.monotonic(), original_key)
+    return original_key
+
+
+def _locate_original_object(bucket: str, lookup_key: str, candidate_name: Optional[str]) -> Optional[str]:
+    # A known filename costs a single HEAD; listing the prefix is only the fallback.
+    if candidate_name:
+        candidate_key = join_key(lookup_key, candidate_name)
+        if object_exists(bucket, candidate_key):
+            return candidate_key
+
     prefix = join_key(lookup_key, "")
-    paginator = S3_CLIENT.get_paginator("list_objects_v2")
+    paginator = get_s3_client().get_paginator("list_objects_v2")
 
     for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
         for obj in page.get("Contents", []):
             key = obj.get("Key")
-            if not key:
-                continue
-            name = PurePosixPath(key).name.lower()
-            if name.endswith(f".{SUPPORTED_INPUT_FORMAT}"):
+            if key and is_supported_workbook_key(key):
                 return key
     return None
 
 
 def object_exists(bucket: str, key: str) -> bool:
     try:
-        S3_CLIENT.head_object(Bucket=bucket, Key=key)
+        get_s3_client().head_object(Bucket=bucket, Key=key)
         return True
     except ClientError as error:
-        error_code = error.response.get("Error", {}).get("Code")
-        if error_code in {"404", "NotFound"}:
+        if _is_not_found(error):
             return False
         raise
 
 
-def read_binary_object(bucket: str, key: str) -> bytes:
+def _is_not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in {"404", "NotFound", "NoSuchKey"}
+
+
+def read_binary_object_if_exists(bucket: str, key: str) -> Optional[bytes]:
     try:
-        response = S3_CLIENT.get_object(Bucket=bucket, Key=key)
+        response = get_s3_client().get_object(Bucket=bucket, Key=key)
     except ClientError as error:
+        if _is_not_found(error):
+            return None
         raise ConversionError(f"Unable to read object s3://{bucket}/{key}") from error
     return response["Body"].read()
 
 
-def read_text_object(bucket: str, key: str) -> str:
-    return read_binary_object(bucket, key).decode("utf-8")
+def read_text_object_if_exists(bucket: str, key: str) -> Optional[str]:
+    contents = read_binary_object_if_exists(bucket, key)
+    return None if contents is None else contents.decode("utf-8")
 
 
 def extract_api_payload(event: Dict[str, Any], *, optional: bool = False) -> Dict[str, Any]:
@@ -209,11 +330,12 @@ def extract_api_payload(event: Dict[str, Any], *, optional: bool = False) -> Dic
 
     body = event["body"]
     if event.get("isBase64Encoded"):
-        body = base64.b64decode(body).decode("utf-8")
+        # Both parsers accept UTF-8 bytes, so the decoded body is never copied into a str.
+        body = b64decode(body)
 
     try:
-        payload = json.loads(body)
-    except json.JSONDecodeError as exc:
+        payload = json_loads(body)
+    except ValueError as exc:  # JSONDecodeError from either parser, or invalid UTF-8
         raise ConversionError("Request body is not valid JSON") from exc
 
     if not isinstance(payload, dict):
@@ -225,13 +347,13 @@ def extract_api_payload(event: Dict[str, Any], *, optional: bool = False) -> Dic
 def json_response(body: Dict[str, Any], *, status_code: int = 200) -> Dict[str, Any]:
     return {
         "statusCode": status_code,
-        "body": json.dumps(body),
+        "body": json_dumps(body),
         "headers": {"Content-Type": "application/json"},
     }
 
 
 def pdf_response(pdf_bytes: bytes, filename: str, *, source_uri: str, target_uri: str) -> Dict[str, Any]:
-    encoded_pdf = base64.b64encode(pdf_bytes).decode("utf-8")
+    encoded_pdf = b64encode_as_string(pdf_bytes)
     return {
         "statusCode": 200,
         "body": encoded_pdf,
@@ -246,10 +368,4 @@ def pdf_response(pdf_bytes: bytes, filename: str, *, source_uri: str, target_uri
 
 
 def is_valid_sha256(value: str) -> bool:
-    if len(value) != 64:
-        return False
-    try:
-        int(value, 16)
-    except ValueError:
-        return False
-    return True
+    return _SHA256_HEX_RE.fullmatch(value) is not None
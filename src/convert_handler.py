@@ -1,8 +1,11 @@
 """Lambda function triggered by S3 uploads to generate PDFs."""
 
+import io
 import os
-from pathlib import Path, PurePosixPath
-from typing import Any, Dict, Optional
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 from urllib.parse import unquote_plus
 
 try:
@@ -16,21 +19,40 @@ except ImportError as exc:  # pragma: no cover - layer is required in production
         "pdfservices-sdk v4 is required but not available; ensure it is included in the Lambda layer or deployment package."
     ) from exc
 
-from botocore.exceptions import ClientError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
 
 from common import (
     LOGGER,
     ConversionError,
     PDF_CONTENT_TYPE,
     RESULT_OBJECT_NAME,
-    S3_CLIENT,
-    SSM_CLIENT,
+    S3_READ_CHUNK_SIZE,
+    get_s3_client,
+    get_ssm_client,
+    is_supported_workbook_key,
     join_key,
+    pdf_filename_for,
     prefix_for_key,
-    write_temp_workbook,
 )
 
+# Workbooks up to this size are uploaded from memory; larger ones are staged in a /tmp file.
+WORKBOOK_IN_MEMORY_MAX_SIZE = 8 * 1024 * 1024
+# PDFs above this size are written with a multipart upload instead of a single PutObject.
+PDF_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+PDF_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=PDF_MULTIPART_THRESHOLD,
+    multipart_chunksize=PDF_MULTIPART_THRESHOLD,
+    max_concurrency=4,
+    use_threads=True,
+)
+MAX_CONCURRENT_CONVERSIONS = 10
+XLSX_MEDIA_TYPE = PDFServicesMediaType.XLSX
+
 _converter: Optional["AdobeWorkbookConverter"] = None
+_CONVERTER_LOCK = threading.Lock()
+_PARAMETER_CACHE: Dict[str, Optional[str]] = {}
 
 
 def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
@@ -39,7 +61,7 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
     if not isinstance(records, list):
         raise ConversionError("S3 event missing Records")
 
-    outcomes = []
+    targets: List[Tuple[str, str]] = []
     for record in records:
         if record.get("eventSource") != "aws:s3":
             continue
@@ -49,11 +71,18 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
             LOGGER.warning("Skipping S3 record missing bucket or key: %s", record)
             continue
         key = unquote_plus(raw_key)
-        if not key.lower().endswith(".xlsx"):
+        if not is_supported_workbook_key(key):
             LOGGER.debug("Skipping non-XLSX object %s", key)
             continue
-        LOGGER.info("Processing S3 object %s/%s", bucket, key)
-        outcomes.append(_convert_object(bucket, key))
+        targets.append((bucket, key))
+
+    outcomes: List[Dict[str, Any]] = []
+    if targets:
+        with ThreadPoolExecutor(max_workers=min(len(targets), MAX_CONCURRENT_CONVERSIONS) + 1) as pool:
+            if _converter is None:
+                # Resolve credentials while the workbooks download; workers wait on the converter lock.
+                pool.submit(_get_converter)
+            outcomes = list(pool.map(lambda target: _convert_object(*target), targets))
 
     return {
         "status": "ok",
@@ -63,35 +92,20 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
 
 
 def _convert_object(bucket: str, key: str) -> Dict[str, Any]:
-    try:
-        response = S3_CLIENT.get_object(Bucket=bucket, Key=key)
-    except ClientError as error:
-        raise ConversionError(f"Unable to read object s3://{bucket}/{key}") from error
-    workbook_bytes = response["Body"].read()
-    temp_path = write_temp_workbook(workbook_bytes)
-
-    try:
-        pdf_bytes = _get_converter().convert(temp_path)
-    finally:
-        Path(temp_path).unlink(missing_ok=True)
+    LOGGER.info("Processing S3 object %s/%s", bucket, key)
+    # The staged workbook is released before polling, which is where most of the wall time goes.
+    converter, location = _submit_object(bucket, key)
+    pdf_bytes = converter.collect(location)
 
-    pdf_filename = f"{PurePosixPath(key).stem}.pdf"
+    pdf_filename = pdf_filename_for(key)
     prefix = prefix_for_key(key)
     pdf_key = join_key(prefix, pdf_filename)
     result_key = join_key(prefix, RESULT_OBJECT_NAME)
 
-    try:
-        S3_CLIENT.put_object(
-            Bucket=bucket,
-            Key=pdf_key,
-            Body=pdf_bytes,
-            ContentType=PDF_CONTENT_TYPE,
-        )
-    except ClientError as error:
-        raise ConversionError(f"Unable to write PDF to s3://{bucket}/{pdf_key}") from error
+    _write_pdf_to_s3(bucket, pdf_key, pdf_bytes)
 
     try:
-        S3_CLIENT.put_object(
+        get_s3_client().put_object(
             Bucket=bucket,
             Key=result_key,
             Body=pdf_filename.encode("utf-8"),
@@ -114,23 +128,67 @@ def _convert_object(bucket: str, key: str) -> Dict[str, Any]:
     }
 
 
+def _submit_object(bucket: str, key: str) -> Tuple["AdobeWorkbookConverter", str]:
+    try:
+        response = get_s3_client().get_object(Bucket=bucket, Key=key)
+    except ClientError as error:
+        raise ConversionError(f"Unable to read object s3://{bucket}/{key}") from error
+    body = response["Body"]
+
+    if response.get("ContentLength", 0) <= WORKBOOK_IN_MEMORY_MAX_SIZE:
+        # The SDK uploads with requests, which sends bytes as-is but calls fileno() on file objects
+        # to size them, so anything file-backed would be forced onto disk.
+        workbook_bytes = body.read()
+        if not workbook_bytes:
+            raise ConversionError("Workbook content is empty")
+        converter = _get_converter()
+        return converter, converter.submit(workbook_bytes)
+
+    with tempfile.NamedTemporaryFile(prefix="xls2pdf", suffix=".xlsx") as workbook:
+        for chunk in body.iter_chunks(S3_READ_CHUNK_SIZE):
+            workbook.write(chunk)
+        workbook.flush()
+        workbook.seek(0)
+        converter = _get_converter()
+        return converter, converter.submit(workbook)
+
+
+def _write_pdf_to_s3(bucket: str, key: str, pdf_bytes: bytes) -> None:
+    try:
+        if len(pdf_bytes) > PDF_MULTIPART_THRESHOLD:
+            get_s3_client().upload_fileobj(
+                io.BytesIO(pdf_bytes),
+                bucket,
+                key,
+                ExtraArgs={"ContentType": PDF_CONTENT_TYPE},
+                Config=PDF_TRANSFER_CONFIG,
+            )
+        else:
+            get_s3_client().put_object(
+                Bucket=bucket,
+                Key=key,
+                Body=pdf_bytes,
+                ContentType=PDF_CONTENT_TYPE,
+            )
+    except (ClientError, S3UploadFailedError) as error:
+        raise ConversionError(f"Unable to write PDF to s3://{bucket}/{key}") from error
+
+
 class AdobeWorkbookConverter:
     """Wraps Adobe PDF Services SDK for converting Excel workbooks to PDF."""
 
     def __init__(self) -> None:
         self._pdf_services = self._initialise_client()
 
-    def convert(self, workbook_path: str) -> bytes:
-        with open(workbook_path, "rb") as handle:  # noqa: PTH123 - Lambda local FS usage
-            workbook_bytes = handle.read()
-
-        LOGGER.info("Running Adobe conversion for workbook '%s'", workbook_path)
+    def submit(self, workbook: Union[bytes, BinaryIO]) -> str:
         input_asset = self._pdf_services.upload(
-            input_stream=workbook_bytes,
-            mime_type=PDFServicesMediaType.XLSX,
+            input_stream=workbook,
+            mime_type=XLSX_MEDIA_TYPE,
         )
         create_pdf_job = CreatePDFJob(input_asset)
-        location = self._pdf_services.submit(create_pdf_job)
+        return self._pdf_services.submit(create_pdf_job)
+
+    def collect(self, location: str) -> bytes:
         job_result = self._pdf_services.get_job_result(location, CreatePDFResult)
         result_asset = job_result.get_result().get_asset()
         stream_asset = self._pdf_services.get_content(result_asset)
@@ -144,45 +202,72 @@ class AdobeWorkbookConverter:
 
     @staticmethod
     def _initialise_client() -> PDFServices:
-        client_id = _resolve_secret_value(
-            value_env="PDF_SERVICES_CLIENT_ID",
-            parameter_env="PDF_SERVICES_CLIENT_ID_PARAMETER",
-            secret_label="client identifier",
-        )
-        client_secret = _resolve_secret_value(
-            value_env="PDF_SERVICES_CLIENT_SECRET",
-            parameter_env="PDF_SERVICES_CLIENT_SECRET_PARAMETER",
-            secret_label="client secret",
+        client_id, client_secret = _resolve_secret_values(
+            ("PDF_SERVICES_CLIENT_ID", "PDF_SERVICES_CLIENT_ID_PARAMETER", "client identifier"),
+            ("PDF_SERVICES_CLIENT_SECRET", "PDF_SERVICES_CLIENT_SECRET_PARAMETER", "client secret"),
         )
         credentials = ServicePrincipalCredentials(client_id=client_id, client_secret=client_secret)
         return PDFServices(credentials=credentials)
 
 
-def _resolve_secret_value(*, value_env: str, parameter_env: str, secret_label: str) -> str:
-    direct_value = os.getenv(value_env)
-    if direct_value:
-        return direct_value
-
-    parameter_name = os.getenv(parameter_env)
-    if not parameter_name:
-        raise ConversionError(
-            f"PDF Services {secret_label} is not configured; set {value_env} or {parameter_env}."
-        )
-
-    try:
-        response = SSM_CLIENT.get_parameter(Name=parameter_name, WithDecryption=True)
-    except ClientError as exc:
-        raise ConversionError(f"Unable to resolve {secret_label} from SSM parameter '{parameter_name}'") from exc
-
-    value = response.get("Parameter", {}).get("Value")
-    if not value:
-        raise ConversionError(f"Retrieved empty {secret_label} from SSM parameter '{parameter_name}'")
+def _resolve_secret_values(*sources: Tuple[str, str, str]) -> List[str]:
+    # Each source is (value_env, parameter_env, secret_label); SSM lookups are batched into one call.
+    values: Dict[str, str] = {}
+    parameter_names: Dict[str, str] = {}
+    for value_env, parameter_env, secret_label in sources:
+        direct_value = os.getenv(value_env)
+        if direct_value:
+            values[secret_label] = direct_value
+            continue
 
-    return value
+        parameter_name = os.getenv(parameter_env)
+        if not parameter_name:
+            raise ConversionError(
+                f"PDF Services {secret_label} is not configured; set {value_env} or {parameter_env}."
+            )
+        parameter_names[secret_label] = parameter_name
+
+    if parameter_names:
+        labels = ", ".join(parameter_names)
+        try:
+            parameters = _get_parameter_values(list(parameter_names.values()))
+        except ClientError as exc:
+            raise ConversionError(f"Unable to resolve {labels} from SSM") from exc
+
+        for secret_label, parameter_name in parameter_names.items():
+            if parameter_name not in parameters:
+                raise ConversionError(
+                    f"Unable to resolve {secret_label} from SSM parameter '{parameter_name}'"
+                )
+            value = parameters[parameter_name]
+            if not value:
+                raise ConversionError(f"Retrieved empty {secret_label} from SSM parameter '{parameter_name}'")
+            values[secret_label] = value
+
+    return [values[secret_label] for _, _, secret_label in sources]
+
+
+def _get_parameter_values(parameter_names: List[str]) -> Dict[str, Optional[str]]:
+    # Cached for the lifetime of the execution environment; only names not seen yet go to SSM.
+    missing = [name for name in dict.fromkeys(parameter_names) if name not in _PARAMETER_CACHE]
+    if missing:
+        response = get_ssm_client().get_parameters(Names=missing, WithDecryption=True)
+        for parameter in response.get("Parameters", []):
+            _PARAMETER_CACHE[parameter["Name"]] = parameter.get("Value")
+    return {name: _PARAMETER_CACHE[name] for name in parameter_names if name in _PARAMETER_CACHE}
 
 
 def _get_converter() -> "AdobeWorkbookConverter":
     global _converter  # pylint: disable=global-statement
     if _converter is None:
-        _converter = AdobeWorkbookConverter()
+        with _CONVERTER_LOCK:
+            if _converter is None:
+                _converter = AdobeWorkbookConverter()
     return _converter
+
+
+get_s3_client()
+try:
+    _converter = AdobeWorkbookConverter()
+except (ConversionError, BotoCoreError) as init_error:
+    LOGGER.warning("Deferring Adobe converter initialisation to first invocation: %s", init_error)
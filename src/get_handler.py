@@ -1,61 +1,81 @@
 """Lambda handler for retrieving converted PDFs."""
 
-from pathlib import PurePosixPath
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict
 
 from common import (
     LOGGER,
     ConversionError,
     RESULT_OBJECT_NAME,
+    SUPPORTED_INPUT_SUFFIX,
     extract_api_payload,
     find_original_object,
     get_default_bucket,
+    get_s3_client,
     is_valid_sha256,
     json_response,
     join_key,
-    object_exists,
+    pdf_filename_for,
     pdf_response,
-    read_binary_object,
-    read_text_object,
+    read_binary_object_if_exists,
+    read_text_object_if_exists,
 )
 
+get_s3_client()
+
+# Reused across warm invocations to overlap the S3 lookups a single request needs.
+_LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="xls2pdf-lookup")
+
 
 def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
     lookup_key = _extract_result_identifier(event)
     bucket = get_default_bucket()
 
-    original_key = find_original_object(bucket, lookup_key)
-    if not original_key:
-        return json_response({"error": "Result not found"}, status_code=404)
-
     result_key = join_key(lookup_key, RESULT_OBJECT_NAME)
-    if not object_exists(bucket, result_key):
-        LOGGER.info("Result file not present for %s; still in progress", lookup_key)
-        original_name = PurePosixPath(original_key).name
-        return json_response(
-            {
-                "filename": original_name,
-                "status": "inprogress",
-                "result": lookup_key,
-            }
+    result_marker = read_text_object_if_exists(bucket, result_key)
+    result_filename = result_marker.strip() if result_marker else ""
+
+    if result_filename:
+        # The marker names both the PDF and, by stem, the workbook to HEAD.
+        candidate_name = f"{result_filename.rpartition('.')[0]}{SUPPORTED_INPUT_SUFFIX}"
+        pdf_key = join_key(lookup_key, result_filename)
+        original_future = _LOOKUP_EXECUTOR.submit(
+            find_original_object, bucket, lookup_key, candidate_name=candidate_name
         )
+        pdf_future = _LOOKUP_EXECUTOR.submit(read_binary_object_if_exists, bucket, pdf_key)
 
-    result_filename = read_text_object(bucket, result_key).strip()
-    original_name = PurePosixPath(original_key).name
-    expected_pdf_name = f"{PurePosixPath(original_name).stem}.pdf"
+        original_key = original_future.result()
+        if not original_key:
+            # PDF fetch overlaps the original lookup; its result is discarded on 404.
+            return json_response({"error": "Result not found"}, status_code=404)
 
-    pdf_key = join_key(lookup_key, expected_pdf_name)
-    if not object_exists(bucket, pdf_key):
-        if not result_filename:
-            raise ConversionError("Result marker found but no PDF filename was recorded")
-        pdf_key = join_key(lookup_key, result_filename)
-        if not object_exists(bucket, pdf_key):
+        pdf_bytes = pdf_future.result()
+        if pdf_bytes is None:
             raise ConversionError(
                 f"Unable to locate PDF output recorded in result marker for '{lookup_key}'"
             )
+    else:
+        original_key = find_original_object(bucket, lookup_key)
+        if not original_key:
+            return json_response({"error": "Result not found"}, status_code=404)
+
+        if result_marker is None:
+            LOGGER.info("Result file not present for %s; still in progress", lookup_key)
+            original_name = original_key.rpartition("/")[2]
+            return json_response(
+                {
+                    "filename": original_name,
+                    "status": "inprogress",
+                    "result": lookup_key,
+                }
+            )
+
+        pdf_key = join_key(lookup_key, pdf_filename_for(original_key))
+        pdf_bytes = read_binary_object_if_exists(bucket, pdf_key)
+        if pdf_bytes is None:
+            raise ConversionError("Result marker found but no PDF filename was recorded")
 
-    pdf_bytes = read_binary_object(bucket, pdf_key)
-    pdf_filename = PurePosixPath(pdf_key).name
+    pdf_filename = pdf_key.rpartition("/")[2]
     source_uri = f"s3://{bucket}/{original_key}"
     target_uri = f"s3://{bucket}/{pdf_key}"
 
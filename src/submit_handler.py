@@ -1,6 +1,5 @@
 """Lambda handler for the xls2pdf submit API."""
 
-import os
 from typing import Any, Dict
 
 from botocore.exceptions import ClientError
@@ -8,19 +7,22 @@ from botocore.exceptions import ClientError
 from common import (
     LOGGER,
     ConversionError,
+    SOURCE_BUCKET,
     SUPPORTED_INPUT_FORMAT,
     XLSX_CONTENT_TYPE,
     build_object_key,
     delete_prefix_contents,
-    calculate_sha256,
     extract_api_payload,
     get_default_bucket,
+    get_s3_client,
+    hex_digest,
     json_response,
     load_workbook_bytes,
     sanitize_filename,
-    S3_CLIENT,
 )
 
+get_s3_client()
+
 
 def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
     payload = extract_api_payload(event)
@@ -40,17 +42,17 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
         raise ConversionError("Payload must include 'data'")
 
     default_bucket = get_default_bucket()
-    workbook_bytes, source_descriptor = load_workbook_bytes(
+    workbook_bytes, source_descriptor, digest = load_workbook_bytes(
         data,
-        default_bucket=os.getenv("SOURCE_BUCKET"),
+        default_bucket=SOURCE_BUCKET,
     )
 
-    file_hash = calculate_sha256(workbook_bytes)
+    file_hash = hex_digest(digest)
     object_key = build_object_key(file_hash, filename)
     delete_prefix_contents(default_bucket, file_hash)
 
     try:
-        S3_CLIENT.put_object(
+        get_s3_client().put_object(
             Bucket=default_bucket,
             Key=object_key,
             Body=workbook_bytes,